@@ -5,10 +5,20 @@
 ##################################################################
 # 1) Imports and light configuration
 ##################################################################
+import os
+import logging
 import streamlit as st                                
 from finding_books import (                            
-    get_final_summary, generate_fictional_book, search_books
+    get_final_summary, request_fictional_book, fallback_fictional_book,
+    search_books, embed_query
 )
+from semantic_cache import SemanticCache
+
+# similarity cache knobs (tune threshold against hit rate / cost)
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "256"))
+
+logger = logging.getLogger(__name__)
 
 ##################################################################
 # Basic page setup (title, layout, header)
@@ -32,14 +42,47 @@ def cached_get_final_summary(title: str) -> str:
     """
     return get_final_summary(title)
 
-@st.cache_data
+@st.cache_resource
+def get_semantic_cache() -> SemanticCache:
+    """
+    Output: one SemanticCache shared by all sessions of this server
+    """
+    return SemanticCache(
+        embed_query,
+        threshold=SEMANTIC_CACHE_THRESHOLD,
+        max_size=SEMANTIC_CACHE_SIZE,
+    )
+
 def cached_generate_fictional_book(query: str) -> tuple:
     """
     Input : user query string
     Output: (generated_title, generated_summary)
-    Note  : cached per unique query; change query to force recompute
+    Note  : reuses a previous answer when a stored query is similar enough
+            (see SEMANTIC_CACHE_THRESHOLD); the query is embedded once and
+            only successful generations are cached
     """
-    return generate_fictional_book(query)
+    cache = get_semantic_cache()
+    try:
+        vector = cache.embed(query)
+        cached, _ = cache.lookup(query, vector=vector)
+    except Exception as e:
+        # embedding failed — skip the cache rather than the recommendation
+        logger.warning("Semantic cache lookup failed: %s", e)
+        vector, cached = None, None
+    if cached is not None:
+        return cached
+
+    try:
+        title, summary = request_fictional_book(query)
+    except Exception as e:
+        return fallback_fictional_book(e)
+
+    if vector is not None:
+        try:
+            cache.store(query, (title, summary), vector=vector)
+        except Exception as e:
+            logger.warning("Semantic cache store failed: %s", e)
+    return title, summary
 
 ##################################################################
 # User input: free-text search box
@@ -99,3 +142,10 @@ if st.button("Recommend Books"):
     # empty input: prompt user to type something
     else:
         st.warning("Please enter a description or keywords to search.")
+
+##################################################################
+# Sidebar: semantic cache metrics (for tuning the threshold)
+##################################################################
+# rendered last so the numbers include this run's lookup/store
+with st.sidebar.expander("Recommendation cache"):
+    st.json(get_semantic_cache().stats())
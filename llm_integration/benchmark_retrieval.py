@@ -0,0 +1,430 @@
+###############################################################################
+                 # Retrieval Benchmark — offline, no API calls #
+
+# Builds synthetic topic-mixture catalogs with a deterministic local embedder,
+# then measures every index variant: build time, index size, query latency
+# (p50/p99), throughput per batch size and recall@k against exact IndexFlatL2
+# search, plus the keyword title matcher used by search_books.
+# Results are written as JSON so runs can be compared side by side.
+#
+#   python benchmark_retrieval.py                      # 1k and 100k catalogs
+#   python benchmark_retrieval.py --sizes 1000,100000,1000000
+#
+# Memory note: peak memory is about 2-3x N*D*4 bytes for the largest catalog
+# (the embeddings, the exact ground-truth index and the variant being
+# measured). The defaults peak around 2 GB at D=1536; a 1M x 1536 catalog
+# needs 12-18 GB, so it is opt-in. Lower --dim on small machines.
+###############################################################################
+
+
+
+##################################################################
+# Imports
+##################################################################
+import os
+import json
+import time
+import argparse
+import hashlib
+import platform
+import tempfile
+
+import faiss
+import numpy as np
+
+from index_storage import STORAGE_TYPES, build_index, exact_neighbors, recall_at_k
+from keyword_search import search_titles
+
+
+##################################################################
+# Deterministic local embedder (stands in for the OpenAI model)
+##################################################################
+class HashingEmbedder:
+    """
+    Input : dim (int), seed (int)
+    Method:
+      - Every token gets a fixed random unit vector seeded from a hash of
+        (seed, token), so the same text always maps to the same embedding.
+      - A text embedding is the normalized sum of its token vectors, which
+        keeps texts that share words close together (like a real model).
+    """
+
+    def __init__(self, dim, seed=0):
+        self.dim = dim
+        self.seed = seed
+        self._cache = {}
+
+    def token_vector(self, token):
+        """
+        Input : token (str)
+        Output: float32 unit vector of shape (dim,)
+        """
+        if token not in self._cache:
+            digest = hashlib.blake2b(f"{self.seed}:{token}".encode("utf-8"), digest_size=8)
+            rng = np.random.default_rng(int.from_bytes(digest.digest(), "little"))
+            vector = rng.standard_normal(self.dim).astype("float32")
+            self._cache[token] = vector / np.linalg.norm(vector)
+        return self._cache[token]
+
+    def token_matrix(self, vocabulary):
+        """
+        Input : list[str] vocabulary
+        Output: float32 array (len(vocabulary), dim), row i == token i
+        """
+        return np.stack([self.token_vector(token) for token in vocabulary])
+
+    def embed(self, texts):
+        """
+        Input : list[str] texts
+        Output: float32 array (N, dim), L2-normalized rows
+        """
+        out = np.zeros((len(texts), self.dim), dtype="float32")
+        for i, text in enumerate(texts):
+            for token in text.lower().split():
+                out[i] += self.token_vector(token)
+        faiss.normalize_L2(out)
+        return out
+
+
+##################################################################
+# Synthetic catalogs and queries
+##################################################################
+SYLLABLES = ["ka", "lo", "mi", "ra", "ne", "to", "vi", "su", "da", "re",
+             "po", "li", "an", "el", "or", "ul", "is", "em", "th", "qu"]
+
+
+def make_vocabulary(size, seed):
+    """
+    Input : size (int), seed (int)
+    Output: list of `size` distinct pseudo-words (deterministic for a seed)
+    """
+    rng = np.random.default_rng(seed)
+    words = set()
+    while len(words) < size:
+        length = rng.integers(2, 5)
+        words.add("".join(rng.choice(SYLLABLES, size=length)))
+    return sorted(words)
+
+
+def embed_token_ids(token_table, token_ids, chunk=1024):
+    """
+    Input : token_table (V, D), token_ids (N, L) int array, chunk size
+    Output: float32 (N, D) normalized embeddings (sum of token vectors)
+    Notes : chunked so the (chunk, L, D) gather stays a few hundred MB.
+    """
+    out = np.empty((token_ids.shape[0], token_table.shape[1]), dtype="float32")
+    for start in range(0, token_ids.shape[0], chunk):
+        out[start:start + chunk] = token_table[token_ids[start:start + chunk]].sum(axis=1)
+    faiss.normalize_L2(out)
+    return out
+
+
+def make_topics(vocab_size, topics, words_per_topic, rng):
+    """
+    Input : vocabulary size, number of topics, words per topic, Generator
+    Output: (topics, words_per_topic) int array of vocabulary ids; topics
+            may share words, like genres that overlap
+    """
+    return np.stack([
+        rng.choice(vocab_size, size=words_per_topic, replace=False)
+        for _ in range(topics)
+    ])
+
+
+def make_catalog(size, vocabulary, token_table, topic_words, rng,
+                 summary_tokens=24, title_tokens=3, mixture=(0.7, 0.15)):
+    """
+    Input : catalog size, vocabulary, its token table, topic word table,
+            numpy Generator
+    Output: (titles list[str], token_ids (N, L), primary topic per entry (N,),
+             embeddings (N, D))
+    Method: each "summary" mixes a primary topic (mixture[0] of its words),
+            a secondary topic (mixture[1]) and general vocabulary (the rest),
+            so the catalog has the cluster structure of real genres. The
+            title is its first title_tokens words, mimicking book_summaries_dict.
+    """
+    topics, words_per_topic = topic_words.shape
+    primary = rng.integers(0, topics, size=size)
+    secondary = rng.integers(0, topics, size=size)
+
+    slots = rng.integers(0, words_per_topic, size=(size, summary_tokens))
+    source = rng.random((size, summary_tokens))
+    token_ids = np.where(
+        source < mixture[0],
+        topic_words[primary[:, None], slots],
+        np.where(
+            source < mixture[0] + mixture[1],
+            topic_words[secondary[:, None], slots],
+            rng.integers(0, len(vocabulary), size=(size, summary_tokens)),
+        ),
+    )
+    titles = [" ".join(vocabulary[t] for t in row[:title_tokens]).title() for row in token_ids]
+    return titles, token_ids, primary, embed_token_ids(token_table, token_ids)
+
+
+def make_queries(token_ids, primary, topic_words, vocabulary, embedder, count, rng, keep=0.5):
+    """
+    Input : catalog token ids, primary topic per entry, topic word table,
+            vocabulary, embedder, query count, Generator
+    Output: (query texts list[str], query embeddings (count, D))
+    Method: each query keeps a random `keep` fraction of one catalog entry's
+            words and replaces the rest with other words from that entry's
+            primary topic — a user describing the kind of book they want.
+    """
+    picks = rng.integers(0, token_ids.shape[0], size=count)
+    sources = token_ids[picks].copy()
+    replace = rng.random(sources.shape) > keep
+    rows, _ = np.nonzero(replace)
+    slots = rng.integers(0, topic_words.shape[1], size=len(rows))
+    sources[replace] = topic_words[primary[picks][rows], slots]
+
+    # embed through the text path, as the app would embed a typed query
+    texts = [" ".join(vocabulary[t] for t in row) for row in sources]
+    return texts, embedder.embed(texts)
+
+
+##################################################################
+# Index variants under test
+##################################################################
+def build_ivf_flat(embeddings):
+    """
+    Input : embeddings (N, D)
+    Output: trained + populated IndexIVFFlat with ~4*sqrt(N) lists
+    Notes : nlist is capped at N // 39 so k-means always gets the minimum
+            training points per list faiss asks for (small catalogs).
+    """
+    size, dimension = embeddings.shape
+    nlist = max(1, min(int(4 * np.sqrt(size)), size // 39))
+    quantizer = faiss.IndexFlatL2(dimension)
+    index = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_L2)
+
+    # faiss only needs ~40-256 points per list to train the coarse quantizer
+    train_size = min(size, 64 * nlist)
+    sample = np.random.default_rng(0).choice(size, size=train_size, replace=False)
+    index.train(embeddings[np.sort(sample)])
+    index.add(embeddings)
+    return index
+
+
+# name -> (builder(embeddings) -> index, list of search-parameter settings)
+VARIANTS = {
+    name: (lambda x, storage=name: build_index(x, storage=storage), [{}])
+    for name in STORAGE_TYPES
+}
+VARIANTS["ivf_flat"] = (build_ivf_flat, [{"nprobe": n} for n in (1, 8, 32, 128)])
+
+
+def apply_search_params(index, params):
+    """
+    Input : index, dict of faiss search parameters (e.g. {"nprobe": 8})
+    Effect: set them through ParameterSpace so any index type works
+    """
+    space = faiss.ParameterSpace()
+    for name, value in params.items():
+        space.set_index_parameter(index, name, value)
+
+
+##################################################################
+# Measurements
+##################################################################
+def index_size_bytes(index):
+    """
+    Output: size of the index once written to disk (as index_books.py does)
+    Notes : used as the memory metric; process RSS deltas are unreliable
+            here because the allocator reuses heap freed by earlier runs.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.faiss")
+        faiss.write_index(index, path)
+        return os.path.getsize(path)
+
+
+def latency_ms(search_fn, queries):
+    """
+    Input : search_fn(one_query) callable, iterable of single queries
+    Output: {"p50": ms, "p99": ms, "mean": ms} over one call per query
+    """
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        search_fn(query)
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return {
+        "p50": float(np.percentile(timings, 50)),
+        "p99": float(np.percentile(timings, 99)),
+        "mean": float(np.mean(timings)),
+    }
+
+
+def throughput_qps(index, queries, k, batch_sizes):
+    """
+    Input : index, query pool (Q, D), k, batch sizes
+    Output: {batch_size: queries per second} over the whole pool
+    """
+    results = {}
+    for batch in batch_sizes:
+        start = time.perf_counter()
+        for offset in range(0, len(queries), batch):
+            index.search(queries[offset:offset + batch], k)
+        results[str(batch)] = len(queries) / (time.perf_counter() - start)
+    return results
+
+
+def benchmark_keyword_search(titles, query_texts, k, count):
+    """
+    Input : synthetic titles, query texts, k, number of timed queries
+    Output: latency dict for the search_books keyword matcher
+    """
+    # short queries, like what users type in the app
+    texts = [" ".join(text.split()[:3]) for text in query_texts[:count]]
+    return {"latency_ms": latency_ms(lambda q: search_titles(q, titles, k), texts)}
+
+
+def benchmark_variant(name, builder, param_sets, embeddings, queries, true_ids, args):
+    """
+    Input : variant name, builder, search parameter settings, catalog
+            embeddings, query pool, exact ids for the pool, CLI args
+    Output: list of result dicts (one per search parameter setting)
+    """
+    start = time.perf_counter()
+    index = builder(embeddings)
+    build_s = time.perf_counter() - start
+    size = index_size_bytes(index)
+
+    results = []
+    for params in param_sets:
+        apply_search_params(index, params)
+        single = [queries[i:i + 1] for i in range(min(args.latency_queries, len(queries)))]
+        results.append({
+            "variant": name,
+            "params": params,
+            "build_s": build_s,
+            "index_bytes": size,
+            "latency_ms": latency_ms(lambda q: index.search(q, args.k), single),
+            "throughput_qps": throughput_qps(index, queries, args.k, args.batch_sizes),
+            f"recall@{args.k}": recall_at_k(index, embeddings, queries, args.k, true_ids),
+        })
+        print(f"  {name:<9} {json.dumps(params):<16} build {build_s:7.2f}s  "
+              f"size {size / 2**20:9.1f} MB  p50 {results[-1]['latency_ms']['p50']:8.3f} ms  "
+              f"recall@{args.k} {results[-1][f'recall@{args.k}']:.4f}")
+
+    del index
+    return results
+
+
+##################################################################
+# Command line
+##################################################################
+def parse_int_list(value):
+    """
+    Input : "1000,100000" -> [1000, 100000]
+    """
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline retrieval benchmark for the book index.")
+    parser.add_argument("--sizes", type=parse_int_list, default=[1_000, 100_000],
+                        help="comma-separated catalog sizes; peak memory is about "
+                             "2-3x size*dim*4 bytes (1M at dim 1536 needs 12-18 GB)")
+    parser.add_argument("--dim", type=int, default=1536,
+                        help="embedding dimension (1536 matches text-embedding-ada-002)")
+    parser.add_argument("--variants", default=",".join(VARIANTS),
+                        help=f"comma-separated subset of: {', '.join(VARIANTS)}")
+    parser.add_argument("--k", type=int, default=10, help="neighbours per query")
+    parser.add_argument("--queries", type=int, default=512,
+                        help="query pool size (throughput + recall)")
+    parser.add_argument("--latency-queries", type=int, default=200,
+                        help="single queries timed for p50/p99")
+    parser.add_argument("--batch-sizes", type=parse_int_list,
+                        default=[1, 2, 4, 8, 16, 32, 64, 128, 256],
+                        help="comma-separated batch sizes for throughput")
+    parser.add_argument("--vocab-size", type=int, default=5000)
+    parser.add_argument("--topics", type=int, default=200,
+                        help="number of synthetic topics (clusters) per catalog")
+    parser.add_argument("--words-per-topic", type=int, default=60)
+    parser.add_argument("--keyword-queries", type=int, default=50,
+                        help="queries timed for the keyword title matcher "
+                             "(a linear scan, slow on large catalogs)")
+    parser.add_argument("--threads", type=int, default=0,
+                        help="faiss OpenMP threads (0 keeps the faiss default)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="retrieval_benchmark.json",
+                        help="JSON report path")
+    args = parser.parse_args(argv)
+
+    args.variants = [v.strip() for v in args.variants.split(",") if v.strip()]
+    unknown = sorted(set(args.variants) - set(VARIANTS))
+    if unknown:
+        parser.error(f"unknown variants: {', '.join(unknown)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.threads:
+        faiss.omp_set_num_threads(args.threads)
+
+    # same seed -> same vocabulary, catalogs and queries on every run
+    embedder = HashingEmbedder(args.dim, seed=args.seed)
+    vocabulary = make_vocabulary(args.vocab_size, args.seed)
+    token_table = embedder.token_matrix(vocabulary)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "faiss": faiss.__version__,
+            "numpy": np.__version__,
+            "faiss_threads": faiss.omp_get_max_threads(),
+            "config": {key: value for key, value in vars(args).items() if key != "out"},
+        },
+        "catalogs": [],
+    }
+
+    for size in args.sizes:
+        print(f"Catalog size {size:,} (dim {args.dim})")
+        rng = np.random.default_rng([args.seed, size])
+
+        start = time.perf_counter()
+        topic_words = make_topics(len(vocabulary), args.topics, args.words_per_topic, rng)
+        titles, token_ids, primary, embeddings = make_catalog(
+            size, vocabulary, token_table, topic_words, rng
+        )
+        query_texts, queries = make_queries(
+            token_ids, primary, topic_words, vocabulary, embedder, args.queries, rng
+        )
+        generate_s = time.perf_counter() - start
+
+        # exact ground truth computed once per catalog, shared by all variants
+        k = min(args.k, size)
+        true_ids = exact_neighbors(embeddings, queries, k)
+
+        catalog = {
+            "size": size,
+            "generate_s": generate_s,
+            "keyword_search": benchmark_keyword_search(
+                titles, query_texts, args.k, args.keyword_queries
+            ),
+            "results": [],
+        }
+        for name in args.variants:
+            builder, param_sets = VARIANTS[name]
+            catalog["results"].extend(
+                benchmark_variant(name, builder, param_sets, embeddings, queries, true_ids, args)
+            )
+        report["catalogs"].append(catalog)
+
+        # free this catalog before generating the next (larger) one
+        del titles, token_ids, primary, embeddings, queries, true_ids
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved report to '{args.out}'.")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,9 @@
 # Goal: load FAISS index + titles, provide:
 #       - get_final_summary(title): 4-paragraph summary (expand or create)
 #       - generate_fictional_book(query): synth title + 4-paragraph summary
+#         (request_fictional_book raises instead of returning a placeholder)
 #       - search_books(query, top_k): simple keyword match in titles
+#       - embed_query(query): embedding vector for a query string
 ###############################################################################
 
 ##################################################################
@@ -11,9 +13,10 @@
 ##################################################################
 import os                 
 import json               
-import faiss             
 import openai            
 from dotenv import load_dotenv  
+from index_storage import load_index
+from keyword_search import search_titles
 
 # load environment from .env if present
 load_dotenv()
@@ -27,9 +30,13 @@ openai.api_key = os.getenv("OPENAI_API_KEY")
 # Load FAISS index and aligned book titles
 ##################################################################
 # Assumption: index row i corresponds to titles[i] (saved together previously)
+# BOOK_INDEX_MMAP=0 disables memory-mapping (private in-process copy instead)
+INDEX_MMAP = os.getenv("BOOK_INDEX_MMAP", "1") != "0"
+
 try:
-    # read the vector index (must match embedding dim used when built)
-    index = faiss.read_index("book_index.faiss")
+    # read the vector index (must match embedding dim used when built);
+    # memory-mapped read-only so worker processes share one page-cache copy
+    index = load_index("book_index.faiss", mmap=INDEX_MMAP)
 
     # load titles in the *same* order the embeddings were added
     with open("book_titles.json", "r", encoding="utf-8") as f:
@@ -102,62 +109,98 @@ def get_final_summary(title: str) -> str:
         return f"Failed to generate summary for '{title}': {str(e)}"
 
 
-def generate_fictional_book(query: str) -> tuple:
+def request_fictional_book(query: str) -> tuple:
     """
     Input : query (str) — user's preferences/keywords
     Output: (title, summary) where summary has four paragraphs
     Behavior:
       - Ask the model to craft a plausible book title + a four-paragraph summary.
       - Parse response using simple "Title:" and "Summary:" markers.
+      - Raises on API errors, and ValueError if the reply lacks either marker,
+        so callers (e.g. caches) can tell a real answer from a failure.
     """
-    try:
-        # instruction prompt with explicit output format
-        prompt = f"""
-        Based on the following user request: "{query}"
-
-        Create a fictional book recommendation that would perfectly match this request. Please provide:
-        1. A compelling and realistic book title
-        2. A comprehensive four-paragraph summary
+    # instruction prompt with explicit output format
+    prompt = f"""
+    Based on the following user request: "{query}"
 
-        Format your response as:
-        Title: [Book Title]
+    Create a fictional book recommendation that would perfectly match this request. Please provide:
+    1. A compelling and realistic book title
+    2. A comprehensive four-paragraph summary
 
-        Summary:
-        [Four-paragraph summary]
-        """
+    Format your response as:
+    Title: [Book Title]
 
-        # call OpenAI to synthesize a recommendation
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a creative librarian who creates fictional book recommendations."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=700,  
-            temperature=0.8 
-        )
+    Summary:
+    [Four-paragraph summary]
+    """
 
-        # get raw content and split into lines for parsing
-        content = response.choices[0].message.content.strip()
-        lines = content.split('\n')
+    # call OpenAI to synthesize a recommendation
+    response = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": "You are a creative librarian who creates fictional book recommendations."},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=700,  
+        temperature=0.8 
+    )
+
+    # get raw content and split into lines for parsing
+    content = response.choices[0].message.content.strip()
+    lines = content.split('\n')
+
+    # parse "Title:" and "Summary:" sections
+    title = ""
+    summary = ""
+    for i, line in enumerate(lines):
+        if line.startswith("Title:"):
+            title = line.replace("Title:", "").strip()
+        elif line.startswith("Summary:"):
+            # everything after "Summary:" is the full multi-paragraph body
+            summary = '\n'.join(lines[i+1:]).strip()
+            break
+
+    # an unparseable reply is a failure, not an (empty) answer
+    if not title or not summary:
+        raise ValueError("model reply has no 'Title:'/'Summary:' sections")
+
+    # return parsed fields (caller renders them)
+    return title, summary
+
+
+def fallback_fictional_book(error: Exception) -> tuple:
+    """
+    Input : error raised by request_fictional_book
+    Output: (title, summary) placeholder that the UI can still render
+    """
+    return "Generated Book", f"Failed to generate fictional book: {str(error)}"
 
-        # parse "Title:" and "Summary:" sections
-        title = ""
-        summary = ""
-        for i, line in enumerate(lines):
-            if line.startswith("Title:"):
-                title = line.replace("Title:", "").strip()
-            elif line.startswith("Summary:"):
-                # everything after "Summary:" is the full multi-paragraph body
-                summary = '\n'.join(lines[i+1:]).strip()
-                break
 
-        # return parsed fields (caller renders them)
-        return title, summary
+def generate_fictional_book(query: str) -> tuple:
+    """
+    Input : query (str) — user's preferences/keywords
+    Output: (title, summary); a readable placeholder if generation fails
+    """
+    try:
+        return request_fictional_book(query)
 
     # fallback to a safe default if anything goes wrong
     except Exception as e:
-        return "Generated Book", f"Failed to generate fictional book: {str(e)}"
+        return fallback_fictional_book(e)
+
+##################################################################
+# Query embedding (same model as index_books.py)
+##################################################################
+EMBEDDING_MODEL = "text-embedding-ada-002"
+
+def embed_query(query: str) -> list:
+    """
+    Input : query (str)
+    Output: embedding vector (list[float]) from the same model used to
+            build book_index.faiss, so vectors are directly comparable
+    """
+    response = client.embeddings.create(input=query, model=EMBEDDING_MODEL)
+    return response.data[0].embedding
 
 ##################################################################
 # Simple keyword search over titles (baseline)
@@ -166,20 +209,9 @@ def search_books(query, top_k=3):
     """
     Input : query (str), top_k (int)
     Output: up to top_k titles with simple keyword matches (case-insensitive)
-    Method:
-      - Split query into words; return titles containing ANY of those words.
     Notes:
-      - This is a minimal baseline. For semantic search, query the FAISS index
-        with the embedding of `query` and rank by distance/score.
+      - This is a minimal baseline (see keyword_search.search_titles). For
+        semantic search, query the FAISS index with the embedding of `query`
+        and rank by distance/score.
     """
-    # normalize user query for case-insensitive matching
-    query_lower = query.lower()
-    matches = []
-
-    # keep titles that contain any query token
-    for title in titles:
-        if any(word in title.lower() for word in query_lower.split()):
-            matches.append(title)
-
-    # cap the results (presentation layer can format further)
-    return matches[:top_k]
+    return search_titles(query, titles, top_k)
@@ -11,14 +11,25 @@
 ##################################################################
 import os          # for reading environment variables
 import json        # for saving the ordered list of titles
+import argparse    # for choosing the index storage format
+import time        # for timing index loads (cold-start cost)
 import faiss       # FAISS: fast similarity search over vectors
 import numpy as np # to handle numeric arrays (embeddings)
 from dotenv import load_dotenv  # to load .env into environment
 import openai      # OpenAI Embeddings API client
+from index_storage import STORAGE_TYPES, build_index, load_index, recall_at_k
 
 load_dotenv()                                  
 openai.api_key = os.getenv("OPENAI_API_KEY")    
 
+# --storage flat|fp16|sq8 : float32 (exact), float16 (1/2 size), 8-bit (1/4 size)
+parser = argparse.ArgumentParser(description="Build the book FAISS index.")
+parser.add_argument("--storage", choices=sorted(STORAGE_TYPES), default="flat",
+                    help="vector storage format for book_index.faiss")
+parser.add_argument("--recall-k", type=int, default=3,
+                    help="k used when measuring recall against exact search")
+args = parser.parse_args()
+
 
 ##################################################################
 # Load book summaries (source data)
@@ -30,6 +41,19 @@ from book_summaries_dict import book_summaries_dict
 titles = list(book_summaries_dict.keys())
 texts  = list(book_summaries_dict.values())
 
+# Held-out queries for measuring recall of compressed storage; these are not
+# in the index, so a query's nearest neighbour is never itself
+SAMPLE_QUERIES = [
+    "I want a book about war",
+    "I want a hopeful sci-fi novel",
+    "Something about rebellion and freedom",
+    "A story about friendship and courage",
+    "A magical adventure for young readers",
+    "A novel about injustice and growing up",
+    "A romance with witty characters and social class",
+    "A book about totalitarian surveillance",
+]
+
 
 ##################################################################
 # Define an embedding helper 
@@ -61,17 +85,30 @@ print(f"Generated {len(embeddings)} embeddings with dimension {len(embeddings[0]
 ##################################################################
 # Build and populate a FAISS index
 ##################################################################
-# Detect vector dimension from the first embedding row
-dimension = len(embeddings[0])
-
 # Add all vectors to the index (row i corresponds to titles[i])
-index = faiss.IndexFlatL2(dimension)
-index.add(embeddings)
-print("FAISS index created and populated.")
+index = build_index(embeddings, storage=args.storage)
+print(f"FAISS index created and populated ({args.storage} storage).")
+
+# Compressed storage trades accuracy for memory: report the loss against
+# exact float32 search on held-out user-style queries
+if args.storage != "flat":
+    query_embeddings = get_embeddings(SAMPLE_QUERIES)
+    recall = recall_at_k(index, embeddings, query_embeddings, args.recall_k)
+    print(f"Recall@{args.recall_k} vs. exact search "
+          f"({len(SAMPLE_QUERIES)} held-out queries): {recall:.4f}")
 
 # Write index to a file you can reload later with faiss.read_index(...)
 faiss.write_index(index, "book_index.faiss")
-print("Saved FAISS index to 'book_index.faiss'.")
+size_kb = os.path.getsize("book_index.faiss") / 1024
+print(f"Saved FAISS index to 'book_index.faiss' ({size_kb:.1f} KB).")
+
+# Load time as the app sees it (the file was just written, so this is a
+# warm page cache; a cold start after reboot adds disk read time)
+for mmap in (False, True):
+    start = time.perf_counter()
+    load_index("book_index.faiss", mmap=mmap)
+    load_ms = (time.perf_counter() - start) * 1000
+    print(f"Loaded index {'memory-mapped' if mmap else 'into private memory'} in {load_ms:.2f} ms.")
 
 # Save titles in the same order as embeddings (to map search results back)
 with open("book_titles.json", "w", encoding="utf-8") as f:
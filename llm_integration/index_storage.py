@@ -0,0 +1,121 @@
+###############################################################################
+# Index Storage — build, compress and load the book FAISS index
+# Goal: one place that knows how vectors are stored on disk:
+#       - build_index(embeddings, storage): flat / float16 / 8-bit index
+#       - load_index(path, mmap): memory-mapped, read-only loading
+#       - recall_at_k(index, reference, queries, k): accuracy vs. exact search
+###############################################################################
+
+##################################################################
+# 1) Imports
+##################################################################
+import warnings
+
+import faiss
+import numpy as np
+
+
+##################################################################
+# Storage formats
+##################################################################
+# name -> faiss scalar quantizer type (None means exact float32 IndexFlatL2)
+STORAGE_TYPES = {
+    "flat": None,                                   # 4 bytes / dim, exact
+    "fp16": faiss.ScalarQuantizer.QT_fp16,          # 2 bytes / dim
+    "sq8": faiss.ScalarQuantizer.QT_8bit,           # 1 byte  / dim
+}
+
+
+def build_index(embeddings, storage="flat"):
+    """
+    Input : embeddings (np.ndarray float32, shape (N, D)), storage name
+    Output: populated FAISS index using L2 distance (row i == input row i)
+    Notes : quantized storages are trained on the same embeddings; sq8
+            learns per-dimension ranges, fp16 needs no real training.
+    """
+    if storage not in STORAGE_TYPES:
+        raise ValueError(
+            f"Unknown storage '{storage}', expected one of {sorted(STORAGE_TYPES)}"
+        )
+
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    dimension = embeddings.shape[1]
+
+    qtype = STORAGE_TYPES[storage]
+    if qtype is None:
+        index = faiss.IndexFlatL2(dimension)
+    else:
+        index = faiss.IndexScalarQuantizer(dimension, qtype, faiss.METRIC_L2)
+        index.train(embeddings)
+
+    index.add(embeddings)
+    return index
+
+
+##################################################################
+# Loading: memory-mapped + read-only so processes share page cache
+##################################################################
+def _warn_private_copy(path, reason):
+    warnings.warn(
+        f"Could not memory-map '{path}' ({reason}); loading a private "
+        f"copy, so memory is not shared across processes.",
+        stacklevel=3,
+    )
+
+
+def load_index(path, mmap=True):
+    """
+    Input : path to a .faiss file, mmap (bool)
+    Output: FAISS index
+    Behavior:
+      - With mmap=True, the vectors stay in the OS page cache and are shared
+        by every process that maps the same file (Streamlit workers, etc.).
+      - Mapping flat/SQ codes needs IO_FLAG_MMAP_IFC; older faiss builds only
+        have IO_FLAG_MMAP, which maps IVF inverted lists and silently reads
+        flat indexes into private memory. Without IO_FLAG_MMAP_IFC, or if
+        mapping fails, this warns and does a normal private read.
+    """
+    if mmap:
+        if not hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+            _warn_private_copy(path, f"faiss {faiss.__version__} has no IO_FLAG_MMAP_IFC")
+        else:
+            try:
+                return faiss.read_index(
+                    path, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+                )
+            except RuntimeError as e:
+                _warn_private_copy(path, e)
+    return faiss.read_index(path)
+
+
+##################################################################
+# Measuring recall loss against exact search
+##################################################################
+def exact_neighbors(reference, queries, k):
+    """
+    Input : reference (N, D) and queries (Q, D) float32 arrays, k
+    Output: (Q, k) int64 ids of exact L2 nearest neighbours (IndexFlatL2)
+    """
+    ground_truth = faiss.IndexFlatL2(reference.shape[1])
+    ground_truth.add(np.ascontiguousarray(reference, dtype="float32"))
+    _, ids = ground_truth.search(np.ascontiguousarray(queries, dtype="float32"), k)
+    return ids
+
+
+def recall_at_k(index, reference, queries, k, true_ids=None):
+    """
+    Input : index under test, reference vectors it was built from,
+            queries, k, optional precomputed exact ids (from exact_neighbors)
+    Output: recall@k in [0, 1] — fraction of exact top-k ids also
+            returned by `index` in its top-k
+    """
+    k = min(k, reference.shape[0])
+    if true_ids is None:
+        true_ids = exact_neighbors(reference, queries, k)
+    _, found_ids = index.search(np.ascontiguousarray(queries, dtype="float32"), k)
+
+    hits = sum(
+        len(set(found[:k]) & set(truth[:k]))
+        for found, truth in zip(found_ids, true_ids)
+    )
+    return hits / float(len(queries) * k)
@@ -0,0 +1,26 @@
+###############################################################################
+# Keyword Search — baseline title matcher
+# Goal: case-insensitive keyword match over a list of titles, with no
+#       API client or index loading, so it can be reused and benchmarked
+#       offline (finding_books.search_books delegates here).
+###############################################################################
+
+
+def search_titles(query, titles, top_k=3):
+    """
+    Input : query (str), titles (list[str]), top_k (int)
+    Output: up to top_k titles with simple keyword matches (case-insensitive)
+    Method:
+      - Split query into words; return titles containing ANY of those words.
+    """
+    # normalize user query for case-insensitive matching
+    words = query.lower().split()
+    matches = []
+
+    # keep titles that contain any query token
+    for title in titles:
+        if any(word in title.lower() for word in words):
+            matches.append(title)
+
+    # cap the results (presentation layer can format further)
+    return matches[:top_k]
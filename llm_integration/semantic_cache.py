@@ -0,0 +1,208 @@
+###############################################################################
+# Semantic Cache — near-duplicate lookup for generated recommendations
+# Goal: reuse a previous (title, summary) when a new query *means* the same
+#       thing as one we already answered, instead of paying for a fresh
+#       generation on every small rewording.
+#       - embed(query): normalized query vector (one embedding call)
+#       - lookup(query, vector): best stored answer above the threshold
+#       - store(query, value, vector): remember an answer (LRU-evicts when full)
+#       - stats(): hits / misses / hit rate / evictions / errors, plus recent
+#         best-match similarities and the hit rate other thresholds would give
+###############################################################################
+
+##################################################################
+# 1) Imports
+##################################################################
+import threading
+from collections import OrderedDict, deque
+
+import faiss
+import numpy as np
+
+
+##################################################################
+# Similarity cache backed by a small FAISS inner-product index
+##################################################################
+class SemanticCache:
+    """
+    Input : embed_fn  — callable(str) -> 1-D float vector for a query
+            threshold — cosine similarity in [-1, 1] required for a hit
+            max_size  — maximum number of cached queries (LRU eviction)
+            score_window — number of recent best-match similarities kept
+                           for threshold tuning (see stats())
+    Method:
+      - Query vectors are L2-normalized, so inner product == cosine similarity.
+      - Entries live in an IndexIDMap so evicted rows can be removed by id.
+      - An OrderedDict keyed by id tracks recency (oldest first).
+    Notes:
+      - Shared across Streamlit sessions, so every public method takes a lock.
+      - Embed once per query with embed() and pass the vector to lookup()
+        and store(); each embedding is a paid API call.
+    """
+
+    # thresholds reported in stats()["hit_rate_at"] besides the current one
+    TUNING_THRESHOLDS = (0.80, 0.85, 0.88, 0.90, 0.92, 0.94, 0.96, 0.98)
+
+    def __init__(self, embed_fn, threshold=0.92, max_size=256, score_window=500):
+        if not -1.0 <= threshold <= 1.0:
+            raise ValueError(f"threshold must be in [-1, 1], got {threshold}")
+        if max_size < 1:
+            raise ValueError(f"max_size must be >= 1, got {max_size}")
+
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.max_size = max_size
+
+        # created lazily once we know the embedding dimension
+        self._index = None
+        # id -> (query, value); insertion order doubles as LRU order
+        self._entries = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        # counters exposed through stats()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+        # best-match similarity of recent lookups against a non-empty cache
+        self._scores = deque(maxlen=score_window)
+
+    def _record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def _check_dimension(self, vector):
+        """
+        Input : query vector (1, D); caller holds the lock
+        Effect: raise ValueError (counted as an error) if D does not match
+                the index, before anything is searched or evicted
+        """
+        if self._index is not None and vector.shape[1] != self._index.d:
+            self.errors += 1
+            raise ValueError(
+                f"vector dimension {vector.shape[1]} does not match cache "
+                f"dimension {self._index.d}"
+            )
+
+    def embed(self, query):
+        """
+        Input : query (str)
+        Output: float32 array of shape (1, D), L2-normalized
+        Notes : failures are counted in stats()["errors"] and re-raised
+        """
+        try:
+            vector = np.asarray(self.embed_fn(query), dtype="float32").reshape(1, -1)
+        except Exception:
+            self._record_error()
+            raise
+        faiss.normalize_L2(vector)
+        return vector
+
+    def lookup(self, query, vector=None):
+        """
+        Input : query (str), vector — optional result of embed(query)
+        Output: (value, similarity) on a hit, (None, similarity) on a miss
+                (similarity is None when the cache is still empty)
+        """
+        if vector is None:
+            vector = self.embed(query)
+        with self._lock:
+            self._check_dimension(vector)
+            if self._index is None or self._index.ntotal == 0:
+                self.misses += 1
+                return None, None
+
+            # nearest stored query by cosine similarity
+            scores, ids = self._index.search(vector, 1)
+            score, entry_id = float(scores[0][0]), int(ids[0][0])
+            if entry_id != -1:
+                self._scores.append(score)
+
+            if entry_id == -1 or score < self.threshold:
+                self.misses += 1
+                return None, score
+
+            # refresh recency so frequently reused answers survive eviction
+            self._entries.move_to_end(entry_id)
+            self.hits += 1
+            return self._entries[entry_id][1], score
+
+    def store(self, query, value, vector=None):
+        """
+        Input : query (str), value (any) — answer to return for similar queries,
+                vector — optional result of embed(query)
+        Effect: add the query vector to the index, evicting the least recently
+                used entry first if the cache is full; failures are counted in
+                stats()["errors"] and re-raised
+        Notes : the dimension is validated before evicting, so a bad vector
+                never costs a valid cached answer
+        """
+        if vector is None:
+            vector = self.embed(query)
+        with self._lock:
+            self._check_dimension(vector)
+            try:
+                if self._index is None:
+                    self._index = faiss.IndexIDMap(faiss.IndexFlatIP(vector.shape[1]))
+
+                # drop the oldest entries until there is room for one more
+                while len(self._entries) >= self.max_size:
+                    old_id, _ = self._entries.popitem(last=False)
+                    self._index.remove_ids(np.array([old_id], dtype="int64"))
+                    self.evictions += 1
+
+                entry_id = self._next_id
+                self._next_id += 1
+                self._index.add_with_ids(vector, np.array([entry_id], dtype="int64"))
+                self._entries[entry_id] = (query, value)
+            except Exception:
+                self.errors += 1
+                raise
+
+    def stats(self):
+        """
+        Output: dict with size, hits, misses, hit_rate, evictions, errors,
+                threshold, and for the recent best-match similarities:
+                  - similarity: count / min / p10 / p50 / p90 / max
+                  - hit_rate_at: {threshold: share of those lookups that
+                    would have been hits} — what a threshold change would do
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            scores = np.array(self._scores, dtype="float64")
+            thresholds = sorted(set(self.TUNING_THRESHOLDS) | {self.threshold})
+
+            if len(scores):
+                similarity = {"count": int(len(scores)), "min": float(scores.min())}
+                for q in (10, 50, 90):
+                    similarity[f"p{q}"] = float(np.percentile(scores, q))
+                similarity["max"] = float(scores.max())
+                hit_rate_at = {
+                    f"{t:.2f}": float((scores >= t).mean()) for t in thresholds
+                }
+            else:
+                similarity, hit_rate_at = {"count": 0}, {}
+
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "errors": self.errors,
+                "similarity": similarity,
+                "hit_rate_at": hit_rate_at,
+            }
+
+    def clear(self):
+        """
+        Effect: drop all entries and reset the counters
+        """
+        with self._lock:
+            self._index = None
+            self._entries.clear()
+            self._scores.clear()
+            self.hits = self.misses = self.evictions = self.errors = 0